@@ -2,13 +2,16 @@ from __future__ import annotations
 from timelines import get_timelines, Name
 from get_life_tables import OUT_DIRECTORY
 from datetime import date
+from bisect import bisect_left, bisect_right
 from regex import search
 import os
 import csv
+import threading
 from my_types import numeric
 
 
 _life_table = None
+_life_table_lock = threading.Lock()
 
 
 class LifeTable:
@@ -17,6 +20,9 @@ class LifeTable:
         self.male_map = male_map
         self.female_map = female_map
         self.timelines = get_timelines()
+        # (sex, timelines revision) -> (sorted expected ages, matching (expected_age, name) entries)
+        self._expected_age_indexes = {}
+        self._expected_age_indexes_lock = threading.Lock()
 
     def __len__(self):
         return min(len(self.male_map), len(self.female_map))
@@ -79,9 +85,46 @@ class LifeTable:
             name_years += remaining * age
         return int(0.5 + name_years / ppl_count)
 
+    def _get_expected_age_index(self, sex: str) -> tuple[list[int], list[tuple[int, Name]]]:
+        revision = self.timelines.revision
+        key = (sex, revision)
+        index = self._expected_age_indexes.get(key)
+        if index is not None:
+            return index
+        with self._expected_age_indexes_lock:
+            index = self._expected_age_indexes.get(key)
+            if index is None:
+                # Indexes built before counts last changed are stale
+                self._expected_age_indexes = {k: v for k, v in self._expected_age_indexes.items() if k[1] == revision}
+                entries = []
+                for name in self.timelines.timelines:
+                    if name.sex != sex:
+                        continue
+                    try:
+                        entries.append((self.get_expected_age(name), name))
+                    except ZeroDivisionError:
+                        # Nobody with the name is covered by the life tables
+                        continue
+                entries.sort(key=lambda entry: entry[0])
+                ages = [entry[0] for entry in entries]
+                index = (ages, entries)
+                self._expected_age_indexes[key] = index
+            return index
 
+    # Names whose expected age is between min_age and max_age inclusive, youngest first. The index for a sex
+    # is built on the first query, after which queries are a binary search
+    def get_names_by_expected_age(self, min_age: int, max_age: int, sex: str) -> list[tuple[int, Name]]:
+        ages, entries = self._get_expected_age_index(sex)
+        low = bisect_left(ages, min_age)
+        high = bisect_right(ages, max_age)
+        return entries[low:high]
+
+
+# Safe to call from several threads. The tables are loaded once, by whichever thread gets the lock first
 def get_life_table() -> LifeTable:
     global _life_table
-    if not _life_table:
-        _life_table = LifeTable.load_tables()
+    if _life_table is None:
+        with _life_table_lock:
+            if _life_table is None:
+                _life_table = LifeTable.load_tables()
     return _life_table
@@ -0,0 +1,127 @@
+from __future__ import annotations
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Iterator, TYPE_CHECKING
+from timelines import TimelineCollection
+
+if TYPE_CHECKING:
+    from expected_age import LifeTable
+
+
+# Exports the derived datasets so they can be loaded in notebooks and other tools without re-deriving them
+#   name_year_counts - one row per name, sex and year with the count, rank and proportion for that year
+#   expected_ages - one row per name and sex with the expected age of someone with that name
+# Files are written one record batch of NAMES_PER_BATCH names at a time, one batch per row group, so only a
+# single batch is held in memory alongside the timelines
+
+
+OUT_DIRECTORY = 'datasets'
+NAMES_PER_BATCH = 10000
+FILE_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+COUNTS_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('sex', pa.string()),
+    ('year', pa.int16()),
+    ('count', pa.int32()),
+    ('rank', pa.int32()),
+    ('proportion', pa.float64()),
+])
+
+EXPECTED_AGE_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('sex', pa.string()),
+    ('expected_age', pa.int16()),
+])
+
+
+def _count_batches(timelines: TimelineCollection) -> Iterator[pa.RecordBatch]:
+    columns = {field: [] for field in COUNTS_SCHEMA.names}
+    for name_index, (name, timeline) in enumerate(timelines.timelines.items(), 1):
+        for year, data in sorted(timeline.yearToCount.list.items()):
+            columns['name'].append(name.name)
+            columns['sex'].append(name.sex)
+            columns['year'].append(year)
+            columns['count'].append(data.count)
+            columns['rank'].append(timeline.get_rank(year))
+            columns['proportion'].append(timeline.get_proportion(year))
+        if name_index % NAMES_PER_BATCH == 0:
+            yield pa.RecordBatch.from_pydict(columns, schema=COUNTS_SCHEMA)
+            columns = {field: [] for field in COUNTS_SCHEMA.names}
+    if columns['name']:
+        yield pa.RecordBatch.from_pydict(columns, schema=COUNTS_SCHEMA)
+
+
+def _expected_age_batches(timelines: TimelineCollection, life_table: LifeTable) -> Iterator[pa.RecordBatch]:
+    columns = {field: [] for field in EXPECTED_AGE_SCHEMA.names}
+    for name in timelines.timelines:
+        try:
+            expected_age = life_table.get_expected_age(name)
+        except ZeroDivisionError:
+            # Nobody with the name is covered by the life tables
+            expected_age = None
+        columns['name'].append(name.name)
+        columns['sex'].append(name.sex)
+        columns['expected_age'].append(expected_age)
+        if len(columns['name']) == NAMES_PER_BATCH:
+            yield pa.RecordBatch.from_pydict(columns, schema=EXPECTED_AGE_SCHEMA)
+            columns = {field: [] for field in EXPECTED_AGE_SCHEMA.names}
+    if columns['name']:
+        yield pa.RecordBatch.from_pydict(columns, schema=EXPECTED_AGE_SCHEMA)
+
+
+def _write_batches(path: str, schema: pa.Schema, batches: Iterator[pa.RecordBatch], file_format: str) -> None:
+    if file_format == 'parquet':
+        writer = pq.ParquetWriter(path, schema)
+    elif file_format == 'arrow':
+        writer = pa.ipc.new_file(path, schema)
+    else:
+        raise ValueError(f'Unsupported file format: {file_format}')
+    with writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+# file_format - 'parquet' for analysts' tools, or 'arrow' for files read_dataset can map without copying
+# Returns the paths written. Expected ages are only exported when a life table is given
+def export_datasets(timelines: TimelineCollection, out_dir: str, life_table: LifeTable = None,
+                    file_format: str = 'parquet') -> list[str]:
+    if file_format not in FILE_EXTENSIONS:
+        raise ValueError(f'Unsupported file format: {file_format}')
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    extension = FILE_EXTENSIONS[file_format]
+
+    paths = []
+    path = os.path.join(out_dir, 'name_year_counts' + extension)
+    _write_batches(path, COUNTS_SCHEMA, _count_batches(timelines), file_format)
+    paths.append(path)
+
+    if life_table is not None:
+        path = os.path.join(out_dir, 'expected_ages' + extension)
+        _write_batches(path, EXPECTED_AGE_SCHEMA, _expected_age_batches(timelines, life_table), file_format)
+        paths.append(path)
+
+    return paths
+
+
+# Arrow files are memory mapped and read without copying. Parquet has to be decoded, but is still read
+# through a memory map rather than buffered reads
+def read_dataset(path: str) -> pa.Table:
+    if path.endswith(FILE_EXTENSIONS['arrow']):
+        source = pa.memory_map(path, 'r')
+        return pa.ipc.open_file(source).read_all()
+    if path.endswith(FILE_EXTENSIONS['parquet']):
+        return pq.read_table(path, memory_map=True)
+    raise ValueError(f'Unsupported file format: {path}')
+
+
+if __name__ == '__main__':
+    from timelines import get_timelines
+    from expected_age import get_life_table
+
+    for file_format in FILE_EXTENSIONS:
+        for written in export_datasets(get_timelines(), OUT_DIRECTORY, get_life_table(), file_format):
+            print(f'Wrote {written}')
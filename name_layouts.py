@@ -0,0 +1,63 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from regex import fullmatch
+from typing import Iterator, Union
+
+
+# Parsers for the file layouts the SSA publishes name counts in. Each layout says which files in a directory
+# it understands and streams their rows one at a time, so callers never hold a whole file in memory
+#   NationalLayout - us_names/yob{year}.txt with name, sex, count
+#   StateLayout - {STATE}.TXT with state, sex, year, name, count
+# Rows are (region, sex, year, name, count) tuples. National rows have the region NATIONAL_REGION
+
+
+NATIONAL_REGION = 'US'
+
+# (region, sex, year, name, count)
+row = tuple[str, str, int, str, int]
+
+
+class FileLayout(ABC):
+
+    @abstractmethod
+    def matches(self, file_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def parse(self, file_path: str) -> Iterator[row]:
+        pass
+
+
+class NationalLayout(FileLayout):
+
+    def matches(self, file_name: str) -> bool:
+        return fullmatch(r'yob\d{4}\.txt', file_name) is not None
+
+    def parse(self, file_path: str) -> Iterator[row]:
+        year = int(fullmatch(r'.*yob(\d{4})\.txt', file_path)[1])
+        with open(file_path, 'r') as file:
+            for line in file:
+                name, sex, count = line.rstrip('\n').split(',')
+                yield NATIONAL_REGION, sex, year, name, int(count)
+
+
+class StateLayout(FileLayout):
+
+    def matches(self, file_name: str) -> bool:
+        return fullmatch(r'[A-Z]{2}\.TXT', file_name) is not None
+
+    def parse(self, file_path: str) -> Iterator[row]:
+        with open(file_path, 'r') as file:
+            for line in file:
+                state, sex, year, name, count = line.rstrip('\n').split(',')
+                yield state, sex, int(year), name, int(count)
+
+
+DEFAULT_LAYOUTS = (NationalLayout(), StateLayout())
+
+
+def find_layout(file_name: str, layouts: tuple[FileLayout, ...] = DEFAULT_LAYOUTS) -> Union[FileLayout, None]:
+    for layout in layouts:
+        if layout.matches(file_name):
+            return layout
+    return None
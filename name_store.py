@@ -0,0 +1,104 @@
+from __future__ import annotations
+import os
+import heapq
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from typing import Iterator
+from timelines import Name, NAME_DIRECTORY
+from name_layouts import FileLayout, DEFAULT_LAYOUTS, find_layout
+
+
+# Out-of-core alternative to TimelineCollection for corpora too large to hold as Python objects, such as the
+# SSA state-level files. Files are streamed through a FileLayout parser into a single Parquet file, written
+# CHUNK_SIZE rows per row group. Queries scan the store BATCH_SIZE rows at a time, so memory is bounded by
+# the batch size and the number of distinct names, not by the size of the corpus.
+# Every row carries a region, NATIONAL_REGION for the national files or the state code, so national and
+# per-state queries run through the same code
+
+
+STATE_NAME_DIRECTORY = 'us_state_names'
+STORE_DIRECTORY = 'name_store'
+CHUNK_SIZE = 1_000_000
+BATCH_SIZE = 256 * 1024
+
+STORE_SCHEMA = pa.schema([
+    ('region', pa.string()),
+    ('sex', pa.string()),
+    ('year', pa.int16()),
+    ('name', pa.string()),
+    ('count', pa.int32()),
+])
+
+
+def _rows_to_batch(rows: list[tuple[str, str, int, str, int]]) -> pa.RecordBatch:
+    columns = [list(column) for column in zip(*rows)]
+    return pa.RecordBatch.from_arrays(columns, schema=STORE_SCHEMA)
+
+
+# Streams every file in dir_name that one of the layouts understands into a Parquet store at store_path.
+# Returns the number of rows written
+def ingest(dir_name: str, store_path: str, layouts: tuple[FileLayout, ...] = DEFAULT_LAYOUTS,
+           chunk_size: int = CHUNK_SIZE) -> int:
+    store_dir = os.path.dirname(store_path)
+    if store_dir and not os.path.exists(store_dir):
+        os.makedirs(store_dir)
+
+    row_count = 0
+    with pq.ParquetWriter(store_path, STORE_SCHEMA) as writer:
+        rows = []
+        for file_name in sorted(os.listdir(dir_name)):
+            layout = find_layout(file_name, layouts)
+            if layout is None:
+                continue
+            for row in layout.parse(os.path.join(dir_name, file_name)):
+                rows.append(row)
+                if len(rows) == chunk_size:
+                    writer.write_batch(_rows_to_batch(rows))
+                    row_count += len(rows)
+                    rows = []
+        if rows:
+            writer.write_batch(_rows_to_batch(rows))
+            row_count += len(rows)
+
+    return row_count
+
+
+class NameStore:
+
+    def __init__(self, store_path: str):
+        self.dataset = ds.dataset(store_path, format='parquet')
+
+    # region - a state code, NATIONAL_REGION, or None for every region in the store
+    def _scan_era(self, start_year: int, end_year: int, sex: str, region: str, columns: list[str])\
+            -> Iterator[pa.RecordBatch]:
+        condition = (ds.field('year') >= start_year) & (ds.field('year') < end_year) & (ds.field('sex') == sex)
+        if region is not None:
+            condition &= ds.field('region') == region
+        return self.dataset.to_batches(columns=columns, filter=condition, batch_size=BATCH_SIZE)
+
+    def get_total_for_era(self, start_year: int, end_year: int, sex: str, region: str = None) -> int:
+        total = 0
+        for batch in self._scan_era(start_year, end_year, sex, region, ['count']):
+            total += pc.sum(batch.column('count')).as_py() or 0
+        return total
+
+    def get_top_counts_names_for_era(self, start_year: int, end_year: int, sex: str, name_count: int,
+                                     region: str = None) -> list[tuple[int, Name]]:
+        name_to_count = {}
+        for batch in self._scan_era(start_year, end_year, sex, region, ['name', 'count']):
+            sums = pa.Table.from_batches([batch]).group_by('name').aggregate([('count', 'sum')])
+            for name, count in zip(sums.column('name').to_pylist(), sums.column('count_sum').to_pylist()):
+                name_to_count[name] = name_to_count.get(name, 0) + count
+        counts = ((count, Name(name, sex)) for name, count in name_to_count.items())
+        return heapq.nlargest(name_count, counts)
+
+
+if __name__ == '__main__':
+    for dir_name, store_name in ((NAME_DIRECTORY, 'national.parquet'), (STATE_NAME_DIRECTORY, 'states.parquet')):
+        if not os.path.exists(dir_name):
+            continue
+        path = os.path.join(STORE_DIRECTORY, store_name)
+        print(f'Ingesting {dir_name} into {path}')
+        print(f'Wrote {ingest(dir_name, path)} rows')
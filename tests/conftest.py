@@ -0,0 +1,38 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timelines import TimelineCollection
+
+
+FIRST_YEAR = 1950
+LAST_YEAR = 1989
+
+
+# Writes a small corpus in the national yob{year}.txt layout. Names drop in and out of years so timelines
+# have gaps, and counts repeat so there are ties in the rankings
+def write_national_names(dir_name: str, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    spellings = sorted({''.join(rng.choice('abcdefgh') for _ in range(5)).title() for _ in range(300)})
+    os.makedirs(dir_name, exist_ok=True)
+    for year in range(FIRST_YEAR, LAST_YEAR + 1):
+        with open(os.path.join(dir_name, f'yob{year}.txt'), 'w') as file:
+            for spelling in spellings:
+                for sex in 'FM':
+                    if rng.random() < 0.7:
+                        file.write(f'{spelling},{sex},{rng.choice([5, 5, 6, 7, rng.randint(5, 5000)])}\n')
+
+
+@pytest.fixture(scope='session')
+def national_dir(tmp_path_factory) -> str:
+    dir_name = str(tmp_path_factory.mktemp('us_names'))
+    write_national_names(dir_name)
+    return dir_name
+
+
+@pytest.fixture(scope='session')
+def timeline_collection(national_dir) -> TimelineCollection:
+    return TimelineCollection.load_names(national_dir)
@@ -0,0 +1,39 @@
+import pytest
+import export_datasets
+from export_datasets import export_datasets as export, read_dataset
+from timelines import Name
+
+
+class _FakeLifeTable:
+
+    def get_expected_age(self, name: Name) -> int:
+        if name.name.startswith('A'):
+            raise ZeroDivisionError()
+        return len(name.name) * 7
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_round_trip(monkeypatch, tmp_path, timeline_collection, file_format):
+    # Several batches, so row groups are exercised
+    monkeypatch.setattr(export_datasets, 'NAMES_PER_BATCH', 64)
+    counts_path, ages_path = export(timeline_collection, str(tmp_path), _FakeLifeTable(), file_format)
+
+    rows = read_dataset(counts_path).to_pylist()
+    expected_row_count = sum(len(t.yearToCount.list) for t in timeline_collection.timelines.values())
+    assert len(rows) == expected_row_count
+    for row in rows:
+        timeline = timeline_collection.get_timeline(Name(row['name'], row['sex']))
+        assert row['count'] == timeline[row['year']].count
+        assert row['rank'] == timeline.get_rank(row['year'])
+        assert row['proportion'] == timeline.get_proportion(row['year'])
+
+    ages = {(row['name'], row['sex']): row['expected_age'] for row in read_dataset(ages_path).to_pylist()}
+    assert len(ages) == len(timeline_collection.timelines)
+    for name in timeline_collection.timelines:
+        expected = None if name.name.startswith('A') else len(name.name) * 7
+        assert ages[(name.name, name.sex)] == expected
+
+
+def test_unsupported_format(tmp_path, timeline_collection):
+    with pytest.raises(ValueError):
+        export(timeline_collection, str(tmp_path), file_format='csv')
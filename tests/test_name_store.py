@@ -0,0 +1,73 @@
+import os
+import heapq
+import random
+import pytest
+from name_layouts import FileLayout, NATIONAL_REGION
+from name_store import ingest, NameStore
+from timelines import Name
+
+
+STATES = ('AK', 'WY', 'VT')
+ERAS = ((1950, 1960), (1955, 1956), (1970, 1990))
+
+
+@pytest.fixture(scope='module')
+def state_rows(tmp_path_factory) -> tuple[str, list[tuple[str, str, int, str, int]]]:
+    rng = random.Random(1)
+    dir_name = str(tmp_path_factory.mktemp('us_state_names'))
+    rows = []
+    for state in STATES:
+        with open(os.path.join(dir_name, f'{state}.TXT'), 'w') as file:
+            for sex in 'FM':
+                for year in range(1950, 1990):
+                    for name in ('Mary', 'Anna', 'Lisa', 'John', 'Noah', 'Emma'):
+                        if rng.random() < 0.6:
+                            row = (state, sex, year, name, rng.randint(5, 200))
+                            rows.append(row)
+                            file.write(','.join(str(field) for field in row) + '\n')
+    with open(os.path.join(dir_name, 'StateReadMe.pdf'), 'w') as file:
+        file.write('not a layout')
+    return dir_name, rows
+
+
+def test_national_store_matches_timeline_collection(tmp_path, national_dir, timeline_collection):
+    path = str(tmp_path / 'national.parquet')
+    row_count = ingest(national_dir, path, chunk_size=1000)
+    assert row_count == sum(len(t.yearToCount) for t in timeline_collection.timelines.values())
+
+    store = NameStore(path)
+    for start_year, end_year in ERAS:
+        for sex in 'MF':
+            expected_total = timeline_collection.get_total_for_era(start_year, end_year, sex)
+            assert store.get_total_for_era(start_year, end_year, sex) == expected_total
+            assert store.get_total_for_era(start_year, end_year, sex, NATIONAL_REGION) == expected_total
+            expected_top = timeline_collection.get_top_counts_names_for_era(start_year, end_year, sex, 10)
+            assert store.get_top_counts_names_for_era(start_year, end_year, sex, 10) == expected_top
+
+
+def test_state_store_filters_by_region(tmp_path, state_rows):
+    dir_name, rows = state_rows
+    path = str(tmp_path / 'states.parquet')
+    assert ingest(dir_name, path, chunk_size=100) == len(rows)
+
+    store = NameStore(path)
+    for start_year, end_year in ERAS:
+        for sex in 'MF':
+            for region in STATES + (None,):
+                selected = [row for row in rows if row[1] == sex and start_year <= row[2] < end_year
+                            and region in (None, row[0])]
+                assert store.get_total_for_era(start_year, end_year, sex, region) == sum(r[4] for r in selected)
+
+                name_to_count = {}
+                for _, _, _, name, count in selected:
+                    name_to_count[name] = name_to_count.get(name, 0) + count
+                expected_top = heapq.nlargest(3, ((count, Name(name, sex)) for name, count in name_to_count.items()))
+                assert store.get_top_counts_names_for_era(start_year, end_year, sex, 3, region) == expected_top
+
+    assert store.get_total_for_era(1950, 1990, 'F', 'CA') == 0
+    assert store.get_top_counts_names_for_era(1950, 1990, 'F', 3, 'CA') == []
+
+
+def test_file_layout_is_abstract():
+    with pytest.raises(TypeError):
+        FileLayout()
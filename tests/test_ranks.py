@@ -0,0 +1,150 @@
+import random
+import threading
+import time
+import pytest
+from timelines import TimelineCollection, Name
+
+
+def _collection(name_to_year_counts: dict[Name, dict[int, int]]) -> TimelineCollection:
+    collection = TimelineCollection()
+    for name, year_counts in name_to_year_counts.items():
+        for year, count in year_counts.items():
+            collection._add_name_year_count(name, year, count)
+    collection.fill_ranks_and_proportions()
+    return collection
+
+
+# Ranks computed from scratch: one plus the number of names of the same sex with a higher count that year
+def _naive_ranks(collection: TimelineCollection) -> dict[tuple[Name, int], tuple[int, float]]:
+    ranks = {}
+    for name, timeline in collection.timelines.items():
+        for year, data in timeline.yearToCount.list.items():
+            others = [t[year].count for n, t in collection.timelines.items() if n.sex == name.sex]
+            rank = 1 + sum(count > data.count for count in others)
+            ranks[(name, year)] = (rank, data.count / sum(others))
+    return ranks
+
+
+def _assert_ranks_match_naive(collection: TimelineCollection) -> None:
+    expected = _naive_ranks(collection)
+    for name, timeline in collection.timelines.items():
+        first_year = timeline.get_first_year()
+        if first_year is None:
+            continue
+        for year in range(first_year - 2, timeline.get_last_year() + 3):
+            rank, proportion = expected.get((name, year), (-1, -1))
+            assert timeline.get_rank(year) == rank
+            assert abs(timeline.get_proportion(year) - proportion) < 1e-12
+
+
+def test_ties_share_a_rank():
+    names = {Name(chr(ord('A') + i), 'F'): {2000: 5} for i in range(26)}
+    names[Name('Zoe', 'F')] = {2000: 4, 2001: 6}
+    names[Name('Top', 'F')] = {2000: 9, 2001: 9}
+    collection = _collection(names)
+    assert collection.get_timeline(Name('Top', 'F')).get_rank(2000) == 1
+    assert collection.get_timeline(Name('A', 'F')).get_rank(2000) == 2
+    assert collection.get_timeline(Name('Z', 'F')).get_rank(2000) == 2
+    assert collection.get_timeline(Name('Zoe', 'F')).get_rank(2000) == 28
+    assert collection.get_rank_climbs(1, 'F', 26) == [(26, 2000, Name('Zoe', 'F'))]
+
+
+def test_delete_first_year_keeps_ranks_aligned():
+    # Ranks 3, 3, 2, 1, 1 for 2000 through 2004
+    names = {
+        Name('Ann', 'F'): {2000: 1, 2001: 1, 2002: 5, 2003: 9, 2004: 9},
+        Name('Bea', 'F'): {2000: 8, 2001: 8, 2002: 8, 2003: 2, 2004: 2},
+        Name('Cat', 'F'): {2000: 7, 2001: 7, 2002: 1, 2003: 1, 2004: 1},
+    }
+    collection = _collection(names)
+    timeline = collection.get_timeline(Name('Ann', 'F'))
+    assert [timeline.get_rank(year) for year in range(2000, 2005)] == [3, 3, 2, 1, 1]
+
+    del timeline[2000]
+    assert timeline.get_rank(2000) == -1
+    assert timeline.get_rank(2002) == 2
+    _assert_ranks_match_naive(collection)
+
+    timeline[1999] = 4
+    assert timeline.get_rank(1999) == 1
+    assert timeline.get_rank(2001) == 3
+    _assert_ranks_match_naive(collection)
+
+
+def test_correction_reranks_other_names_and_climb_index():
+    names = {
+        Name('Ann', 'M'): {2000: 10, 2005: 50},
+        Name('Ben', 'M'): {2000: 20, 2005: 40},
+        Name('Cal', 'M'): {2000: 30, 2005: 30},
+    }
+    collection = _collection(names)
+    assert collection.get_rank_climbs(5, 'M', 1) == [(2, 2000, Name('Ann', 'M'))]
+
+    collection.get_timeline(Name('Cal', 'M'))[2005] = 100
+    assert collection.get_timeline(Name('Ann', 'M')).get_rank(2005) == 2
+    assert collection.get_rank_climbs(5, 'M', 1) == [(1, 2000, Name('Ann', 'M'))]
+    _assert_ranks_match_naive(collection)
+
+
+def test_random_corrections_match_naive_ranking():
+    rng = random.Random(0)
+    names = {}
+    for i in range(30):
+        name = Name(f'N{i}', rng.choice('MF'))
+        names[name] = {year: rng.randint(5, 12) for year in range(1990, 2000) if rng.random() < 0.7}
+    collection = _collection(names)
+    _assert_ranks_match_naive(collection)
+
+    for _ in range(20):
+        for _ in range(rng.randint(1, 10)):
+            timeline = rng.choice(list(collection.timelines.values()))
+            year = rng.randint(1987, 2002)
+            if rng.random() < 0.3:
+                del timeline[year]
+            else:
+                timeline[year] = rng.randint(5, 12)
+        _assert_ranks_match_naive(collection)
+
+
+def test_load_fills_ranks(timeline_collection):
+    timeline = next(iter(timeline_collection.timelines.values()))
+    first_year = timeline.get_first_year()
+    assert timeline.get_rank(first_year) >= 1
+    assert 0 < timeline.get_proportion(first_year) <= 1
+
+
+def test_span_must_be_positive():
+    collection = _collection({Name('Ann', 'F'): {2000: 5, 2001: 6}})
+    for span in (0, -1):
+        with pytest.raises(ValueError):
+            collection.get_rank_climbs(span, 'F', 0)
+
+
+# Readers arriving while a correction is being re-ranked must wait for it rather than see the old rank
+def test_concurrent_readers_see_corrected_rank(monkeypatch):
+    names = {Name(f'N{i}', 'F'): {2000: 10 * i + 10} for i in range(10)}
+    collection = _collection(names)
+    rank_groups = collection._rank_groups
+
+    def slow_rank_groups(groups):
+        # Hold the re-ranking open long enough for the other readers to arrive
+        time.sleep(0.05)
+        rank_groups(groups)
+
+    monkeypatch.setattr(collection, '_rank_groups', slow_rank_groups)
+    timeline = collection.get_timeline(Name('N0', 'F'))
+    for count in (1000, 1, 55, 1000):
+        timeline[2000] = count
+        expected = 1 + sum(t[2000].count > count for t in collection.timelines.values())
+        results = []
+
+        def read(delay):
+            time.sleep(delay)
+            results.append(timeline.get_rank(2000))
+
+        threads = [threading.Thread(target=read, args=(0.01 * i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [expected] * 4
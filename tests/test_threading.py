@@ -0,0 +1,60 @@
+import time
+import threading
+import timelines
+from timelines import TimelineCollection
+
+
+THREAD_COUNTS = (1, 2, 4, 8)
+ITERATIONS_PER_THREAD = 500
+
+
+def _run_threads(thread_count: int, target) -> None:
+    barrier = threading.Barrier(thread_count)
+
+    def run():
+        barrier.wait()
+        target()
+
+    threads = [threading.Thread(target=run) for _ in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_get_timelines_loads_once(monkeypatch, national_dir):
+    load_count = []
+    load_names = TimelineCollection.load_names
+
+    def slow_load_names(dir_name):
+        load_count.append(dir_name)
+        # Widen the window in which an unguarded singleton would be loaded twice
+        time.sleep(0.05)
+        return load_names(dir_name)
+
+    monkeypatch.setattr(timelines, '_timeline_collection', None)
+    monkeypatch.setattr(timelines, 'NAME_DIRECTORY', national_dir)
+    monkeypatch.setattr(TimelineCollection, 'load_names', slow_load_names)
+
+    results = []
+    _run_threads(16, lambda: results.append(timelines.get_timelines()))
+
+    assert len(load_count) == 1
+    assert len(results) == 16
+    assert all(result is results[0] for result in results)
+
+
+def test_concurrent_iteration_matches_serial(timeline_collection):
+    timeline = max(timeline_collection.timelines.values(), key=lambda t: len(t.yearToCount))
+    expected = [(year, data.count) for year, data in timeline]
+
+    for thread_count in THREAD_COUNTS:
+        mismatches = []
+
+        def read():
+            for _ in range(ITERATIONS_PER_THREAD):
+                if [(year, data.count) for year, data in timeline] != expected:
+                    mismatches.append(threading.get_ident())
+
+        _run_threads(thread_count, read)
+        assert not mismatches
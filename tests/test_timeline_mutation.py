@@ -0,0 +1,40 @@
+import random
+import pytest
+from timelines import _Timeline, _NameYearData, Name
+
+
+# Compares a timeline against a plain dict of year to count after every random insert, correction and delete
+@pytest.mark.parametrize('seed', range(50))
+def test_mutations_match_naive_reference(seed):
+    rng = random.Random(seed)
+    timeline = _Timeline(Name('Ann', 'F'))
+    reference = {}
+    for _ in range(rng.randint(1, 400)):
+        year = rng.randint(1880, 1900)
+        operation = rng.random()
+        if operation < 0.35:
+            del timeline[year]
+            reference.pop(year, None)
+        elif operation < 0.5:
+            count = rng.randint(1, 50)
+            timeline[year] = _NameYearData(count)
+            reference[year] = count
+        else:
+            count = rng.randint(1, 50)
+            timeline[year] = count
+            reference[year] = count
+
+        assert timeline.yearToCount.min_idx == (min(reference) if reference else None)
+        assert timeline.yearToCount.max_idx == (max(reference) if reference else None)
+        assert timeline.size == max(reference.values(), default=0)
+        assert {year: data.count for year, data in timeline if data} == reference
+
+
+def test_delete_only_year():
+    timeline = _Timeline(Name('Ann', 'F'))
+    timeline[1900] = 5
+    del timeline[1900]
+    assert timeline.get_first_year() is None
+    assert timeline.get_last_year() is None
+    assert timeline.size == 0
+    assert list(timeline) == []
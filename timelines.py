@@ -1,23 +1,27 @@
 from __future__ import annotations
-from regex import search
 import os
 import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
 from random import shuffle
 from typing import Union, Any, Iterator, Callable
 from my_types import vector, numeric
+from name_layouts import NationalLayout
 from collections.abc import Iterable
 
 # Component Overview
 #   TimelineCollection - Class that contains all the Timelines and methods for doing analysis on the data
 #   _Timeline - Class containing a Name and an InfiniteZeroedList with the counts per year for that name
-#   _NameYearData - Class to hold data for a name for a year. As of the writing of this, only the count was being used
+#   _NameYearData - Class to hold data for a name for a year. Ranks and proportions are kept in arrays on _Timeline
 #   _InfiniteZeroedList - Class allows setting values at indexes and returns a default value for indices not yet set.
 #   Name - Class with spelling and sex fields
 #   NamePosition - Class to specify when a name enters and exits some category, e.g. top name
 
 
-_NAME_DIRECTORY = 'us_names'
+NAME_DIRECTORY = 'us_names'
 _timeline_collection = None
+_timeline_collection_lock = threading.Lock()
 
 
 # smooth - the points to the left and to the right to average
@@ -66,15 +70,12 @@ class _InfiniteZeroedList:
         return self.default
 
     def __delitem__(self, idx: int):
-        if idx in self.list:
-            del self.list[idx]
-        if self.list:
-            if self.min_idx == idx:
-                while self.min_idx not in self.list:
-                    self.min_idx += 1
-            elif self.max_idx == idx:
-                while self.max_idx not in self.list:
-                    self.max_idx -= 1
+        if idx not in self.list:
+            return
+        del self.list[idx]
+        # Only deleting a bound needs a rescan. Timelines span a couple of hundred years at most
+        if idx == self.min_idx or idx == self.max_idx:
+            self._rebuild_bounds()
 
     def __setitem__(self, idx: int, value: Any):
         self.list[idx] = value
@@ -83,6 +84,17 @@ class _InfiniteZeroedList:
         if self.max_idx is None or self.max_idx < idx:
             self.max_idx = idx
 
+    def _rebuild_bounds(self) -> None:
+        if self.list:
+            self.min_idx = min(self.list)
+            self.max_idx = max(self.list)
+        else:
+            self.min_idx = None
+            self.max_idx = None
+
+    def __len__(self) -> int:
+        return len(self.list)
+
     def __iter__(self) -> Iterator[Any]:
         return iter(self.list.values())
 
@@ -113,10 +125,6 @@ class _NameYearData:
 
     def __init__(self, count: int):
         self.count = count
-        # ToDo
-        # Use or remove the following two properties
-        self.rank = -1
-        self.proportion = -1
 
     def __bool__(self):
         return self.count > 0
@@ -131,7 +139,14 @@ class _Timeline(Iterable):
     def __init__(self, name: Name):
         self.name = name
         self.yearToCount = _InfiniteZeroedList(_NameYearData(0))
+        # Peak count over all years
         self.size = 0
+        # Rank and proportion per year starting at rank_base_year, -1 for years without the name. Filled in by
+        # the collection, which is told about every change so it can re-rank the affected years
+        self.ranks = array('i')
+        self.proportions = array('d')
+        self.rank_base_year = None
+        self.collection = None
 
     def __str__(self):
         return f'{self.name}: {self.yearToCount}'
@@ -140,39 +155,50 @@ class _Timeline(Iterable):
         return self.yearToCount[year]
 
     def __delitem__(self, year: int):
-        count = self.yearToCount[year]
+        count = self.yearToCount[year].count
         del self.yearToCount[year]
-        if self.size == count:
-            self.size = max(self.yearToCount)
+        if count == self.size:
+            self._rebuild_size()
+        if count and self.collection is not None:
+            self.collection._on_count_change(self.name.sex, year, -count)
 
     def __setitem__(self, year: int, data: Union[_NameYearData, int]):
+        previous_count = self.yearToCount[year].count
         if isinstance(data, _NameYearData):
             self.yearToCount[year] = data
         elif self.yearToCount[year]:
             self.yearToCount[year].count = data
         else:
             self.yearToCount[year] = _NameYearData(data)
-        
-        if self.yearToCount[year].count > self.size:
-            self.size = self.yearToCount[year].count
+
+        count = self.yearToCount[year].count
+        if count >= self.size:
+            self.size = count
+        elif previous_count == self.size:
+            # A downward correction to the peak year
+            self._rebuild_size()
+        if self.collection is not None:
+            self.collection._on_count_change(self.name.sex, year, count - previous_count)
+
+    # Full rescan, only needed when the peak year is deleted or corrected downward. Timelines span at most
+    # about 145 stored years, so this stays cheap next to keeping a heap per timeline
+    def _rebuild_size(self) -> None:
+        self.size = max((data.count for data in self.yearToCount), default=0)
 
     def __lt__(self, other):
         if isinstance(other, type(self)):
             return self.size < other.size
         return False
 
-    def __iter__(self):
-        self.min = self.get_first_year()
-        self.max = self.get_last_year()
-        self.year = self.min
-        return self
-
-    def __next__(self) -> tuple[int, int]:
-        if self.year <= self.max:
-            val = (self.year, self.yearToCount[self.year])
-            self.year += 1
-            return val
-        raise StopIteration
+    # Iteration state lives in the generator rather than on the timeline, so several threads
+    # can iterate over the same timeline at once
+    def __iter__(self) -> Iterator[tuple[int, _NameYearData]]:
+        first_year = self.get_first_year()
+        last_year = self.get_last_year()
+        if first_year is None:
+            return
+        for year in range(first_year, last_year + 1):
+            yield year, self.yearToCount[year]
 
     def get_first_year(self) -> int:
         first_year = self.yearToCount.min_idx
@@ -181,6 +207,63 @@ class _Timeline(Iterable):
     def get_last_year(self) -> int:
         return self.yearToCount.max_idx
 
+    # Fits the rank arrays to the current first and last year. Ranks already computed for years in both the
+    # old and new range are kept unless reset is set
+    def _resize_rank_arrays(self, reset: bool = False) -> None:
+        first_year = self.get_first_year()
+        if first_year is None:
+            self.ranks = array('i')
+            self.proportions = array('d')
+            self.rank_base_year = None
+            return
+        length = self.get_last_year() - first_year + 1
+        if not reset and first_year == self.rank_base_year and length == len(self.ranks):
+            return
+        ranks = array('i', [-1]) * length
+        proportions = array('d', [-1]) * length
+        if not reset and self.rank_base_year is not None:
+            start = max(first_year, self.rank_base_year)
+            end = min(first_year + length, self.rank_base_year + len(self.ranks))
+            for year in range(start, end):
+                ranks[year - first_year] = self.ranks[year - self.rank_base_year]
+                proportions[year - first_year] = self.proportions[year - self.rank_base_year]
+        self.ranks = ranks
+        self.proportions = proportions
+        self.rank_base_year = first_year
+
+    def _get_array_offset(self, year: int) -> Union[int, None]:
+        if self.collection is not None:
+            self.collection._refresh_ranks()
+        if self.rank_base_year is None or not 0 <= year - self.rank_base_year < len(self.ranks):
+            return None
+        return year - self.rank_base_year
+
+    def get_rank(self, year: int) -> int:
+        offset = self._get_array_offset(year)
+        if offset is None:
+            return -1
+        return self.ranks[offset]
+
+    def get_proportion(self, year: int) -> float:
+        offset = self._get_array_offset(year)
+        if offset is None:
+            return -1
+        return self.proportions[offset]
+
+    # Largest rank improvement between two years exactly span years apart, and the earlier year. None if the
+    # name was never ranked at both ends of such a pair
+    def _get_best_rank_climb(self, span: int) -> Union[tuple[int, int], None]:
+        best = None
+        for offset in range(len(self.ranks) - span):
+            start_rank = self.ranks[offset]
+            end_rank = self.ranks[offset + span]
+            if start_rank < 0 or end_rank < 0:
+                continue
+            climb = start_rank - end_rank
+            if best is None or climb > best[0]:
+                best = (climb, self.rank_base_year + offset)
+        return best
+
 
 class NamePosition:
 
@@ -198,34 +281,36 @@ class TimelineCollection:
         self.year_to_female_total = {}
         self.first_year = -1
         self.last_year = -1
+        # Set once ranks are filled in. After that, changed (year, sex) groups are re-ranked on the next read
+        self._ranked = False
+        self._dirty_rank_groups = set()
+        # (span, sex) -> (sorted climbs, matching (climb, start_year, name) entries)
+        self._rank_climb_indexes = {}
+        self._ranks_lock = threading.Lock()
+        # Incremented on every count change, so indexes built elsewhere can tell they are stale
+        self.revision = 0
 
     @classmethod
     def load_names(cls, dir_name: str) -> TimelineCollection:
 
         names = cls()
-        years = []
+        years = set()
 
+        layout = NationalLayout()
         for file_name in os.listdir(dir_name):
 
-            if not file_name.endswith('.txt'):
+            if not layout.matches(file_name):
                 continue
 
             file_path = os.path.join(dir_name, file_name)
-            year = int(search('yob(\d{4})\.txt', file_name)[1])
-            years.append(year)
-
-            with open(file_path, 'r') as file:
-                for line in file:
-                    line = line.rstrip('\n')
-                    line = line.split(',')
-                    name, sex, count = line
-                    name = Name(name, sex)
-                    count = int(count)
-                    names._add_name_year_count(name, year, count)
-                    names._add_year_count(sex, year, count)
+            for _, sex, year, name, count in layout.parse(file_path):
+                years.add(year)
+                name = Name(name, sex)
+                names._add_name_year_count(name, year, count)
 
         names.first_year = min(years)
         names.last_year = max(years)
+        names.fill_ranks_and_proportions()
 
         return names
 
@@ -241,9 +326,120 @@ class TimelineCollection:
 
     def _add_name_year_count(self, name: Name, year: int, count: int) -> None:
         if name not in self.timelines:
-            self.timelines[name] = _Timeline(name)
+            timeline = _Timeline(name)
+            timeline.collection = self
+            self.timelines[name] = timeline
         self.timelines[name][year] = count
 
+    # Called by a timeline whenever one of its counts changes
+    def _on_count_change(self, sex: str, year: int, delta: int) -> None:
+        self._add_year_count(sex, year, delta)
+        self.revision += 1
+        if self._ranked:
+            self._dirty_rank_groups.add((year, sex))
+
+    def _get_year_total(self, year: int, sex: str) -> int:
+        if sex == 'M':
+            return self.year_to_male_total.get(year, 0)
+        return self.year_to_female_total.get(year, 0)
+
+    # Fills in the rank and proportion arrays of every timeline. Rank 1 is the most common name for a sex in a
+    # year. Equal counts share a rank and the next count skips the shared places, so with 26 names tied at
+    # 5 births, a name with 4 births is ranked 27 places below them
+    def fill_ranks_and_proportions(self) -> None:
+        with self._ranks_lock:
+            self._rank_groups(None)
+            self._rank_climb_indexes = {}
+            self._dirty_rank_groups.clear()
+            self._ranked = True
+
+    # Groups stay marked dirty until they are re-ranked, so readers skipping the lock on a clean collection
+    # never see ranks that are still being recomputed
+    def _refresh_ranks(self) -> None:
+        if not self._dirty_rank_groups:
+            return
+        with self._ranks_lock:
+            if self._dirty_rank_groups:
+                groups = set(self._dirty_rank_groups)
+                self._rank_groups(groups)
+                self._rank_climb_indexes = {}
+                self._dirty_rank_groups.difference_update(groups)
+
+    # groups - the (year, sex) groups to re-rank, or None to rank everything from scratch
+    def _rank_groups(self, groups: Union[set[tuple[int, str]], None]) -> None:
+        sex_to_years = {}
+        if groups is not None:
+            for year, sex in groups:
+                sex_to_years.setdefault(sex, set()).add(year)
+
+        group_to_counts = {}
+        for name, timeline in self.timelines.items():
+            stored = timeline.yearToCount.list
+            years = stored if groups is None else sex_to_years.get(name.sex, ())
+            for year in years:
+                if year in stored:
+                    group_to_counts.setdefault((year, name.sex), []).append(stored[year].count)
+
+        group_to_count_ranks = {}
+        for group, counts in group_to_counts.items():
+            counts.sort(reverse=True)
+            count_to_rank = {}
+            for position, count in enumerate(counts, 1):
+                if count not in count_to_rank:
+                    count_to_rank[count] = position
+            group_to_count_ranks[group] = count_to_rank
+
+        for name, timeline in self.timelines.items():
+            timeline._resize_rank_arrays(reset=groups is None)
+            stored = timeline.yearToCount.list
+            years = stored if groups is None else sex_to_years.get(name.sex, ())
+            for year in years:
+                offset = year - timeline.rank_base_year if timeline.rank_base_year is not None else -1
+                if not 0 <= offset < len(timeline.ranks):
+                    continue
+                if year in stored:
+                    count = stored[year].count
+                    timeline.ranks[offset] = group_to_count_ranks[(year, name.sex)][count]
+                    timeline.proportions[offset] = count / self._get_year_total(year, name.sex)
+                else:
+                    timeline.ranks[offset] = -1
+                    timeline.proportions[offset] = -1
+
+    def _get_rank_climb_index(self, span: int, sex: str) -> tuple[list[int], list[tuple[int, int, Name]]]:
+        self._refresh_ranks()
+        key = (span, sex)
+        index = self._rank_climb_indexes.get(key)
+        if index is not None:
+            return index
+        with self._ranks_lock:
+            index = self._rank_climb_indexes.get(key)
+            if index is None:
+                entries = []
+                for name, timeline in self.timelines.items():
+                    if name.sex != sex:
+                        continue
+                    best = timeline._get_best_rank_climb(span)
+                    if best is not None:
+                        entries.append((best[0], best[1], name))
+                entries.sort(key=lambda entry: entry[0])
+                climbs = [entry[0] for entry in entries]
+                index = (climbs, entries)
+                self._rank_climb_indexes[key] = index
+            return index
+
+    # Names whose rank improved by between min_climb and max_climb places from one year to the year exactly
+    # span years later, using each name's best such pair of years. Returns (climb, start_year, name) tuples,
+    # largest climb first. The index for a span and sex is built on the first query, after which queries are a
+    # binary search
+    def get_rank_climbs(self, span: int, sex: str, min_climb: int, max_climb: int = None)\
+            -> list[tuple[int, int, Name]]:
+        if span <= 0:
+            raise ValueError(f'span must be positive, got {span}')
+        climbs, entries = self._get_rank_climb_index(span, sex)
+        low = bisect_left(climbs, min_climb)
+        high = len(climbs) if max_climb is None else bisect_right(climbs, max_climb)
+        return entries[low:high][::-1]
+
     def get_total_for_era(self, start_year: int, end_year: int, sex: str) -> int:
         total = 0
         for year in range(start_year, end_year):
@@ -358,9 +554,12 @@ class TimelineCollection:
         return _derivative(X, Y, smooth)
 
 
-def get_timelines():
+# Safe to call from several threads. The names are loaded once, by whichever thread gets the lock first
+def get_timelines() -> TimelineCollection:
     global _timeline_collection
-    if not _timeline_collection:
-        print('loading names')
-        _timeline_collection = TimelineCollection.load_names(_NAME_DIRECTORY)
+    if _timeline_collection is None:
+        with _timeline_collection_lock:
+            if _timeline_collection is None:
+                print('loading names')
+                _timeline_collection = TimelineCollection.load_names(NAME_DIRECTORY)
     return _timeline_collection